@@ -0,0 +1,231 @@
+"""Admission control and load shedding for the API.
+
+Every request is mapped to a ``RouteLimit`` that caps how many requests of
+that kind may run at once and assigns a ``Priority``. A global concurrency
+budget is shared between all routes, with lower priorities only allowed to
+use part of it so that cheap, important endpoints keep headroom during
+spikes. Requests that cannot be admitted wait in a priority queue until
+their route's queue deadline, after which they are rejected with 503 and a
+``Retry-After`` header instead of piling up behind slow upstream calls.
+When the queue is full, a new request evicts the lowest-priority waiter if
+it outranks it, so low-priority backlog cannot shut out critical routes.
+
+Queued requests do not watch for ``http.disconnect``: a client that gives
+up while queued keeps its place until it is admitted or its deadline
+passes. Until then it still counts towards the queue limit, so it can get
+live requests rejected or evicted. Queue deadlines bound how long this lasts.
+"""
+import asyncio
+import json
+import math
+import re
+import time
+from enum import IntEnum
+from typing import Any, Dict, Iterable, List, Optional
+
+
+class Priority(IntEnum):
+    CRITICAL = 0
+    HIGH = 1
+    NORMAL = 2
+    LOW = 3
+
+
+# Fraction of the global concurrency budget each priority may occupy
+DEFAULT_PRIORITY_SHARES = {
+    Priority.CRITICAL: 1.0,
+    Priority.HIGH: 0.9,
+    Priority.NORMAL: 0.75,
+    Priority.LOW: 0.5,
+}
+
+
+class RouteLimit:
+    """Concurrency limit, priority and queue deadline for a group of routes"""
+
+    def __init__(self, name: str, pattern: str, priority: Priority, max_concurrency: int,
+                 queue_timeout: float, methods: Optional[Iterable[str]] = None):
+        self.name = name
+        self.pattern = re.compile(pattern)
+        self.priority = priority
+        self.max_concurrency = max_concurrency
+        self.queue_timeout = queue_timeout
+        self.methods = {method.upper() for method in methods} if methods else None
+
+        self.in_flight = 0
+        self.admitted = 0
+        self.rejected_queue_full = 0
+        self.rejected_timeout = 0
+        self.rejected_evicted = 0
+        self.queue_wait_total = 0.0
+        self.queue_wait_max = 0.0
+
+    def matches(self, method: str, path: str) -> bool:
+        if self.methods and method not in self.methods:
+            return False
+        return self.pattern.match(path) is not None
+
+    @property
+    def retry_after(self) -> int:
+        return max(1, math.ceil(self.queue_timeout))
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "priority": self.priority.name.lower(),
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "admitted": self.admitted,
+            "rejected_queue_full": self.rejected_queue_full,
+            "rejected_timeout": self.rejected_timeout,
+            "rejected_evicted": self.rejected_evicted,
+            "queue_wait_avg_ms": round(self.queue_wait_total / self.admitted * 1000, 2) if self.admitted else 0.0,
+            "queue_wait_max_ms": round(self.queue_wait_max * 1000, 2),
+        }
+
+
+class _Waiter:
+    def __init__(self, route: RouteLimit, sequence: int):
+        self.route = route
+        self.sequence = sequence
+        self.future = asyncio.get_running_loop().create_future()
+
+    @property
+    def sort_key(self):
+        return (self.route.priority, self.sequence)
+
+
+class AdmissionController:
+    """Admits requests against per-route and priority-weighted global limits"""
+
+    def __init__(self, routes: List[RouteLimit], default: RouteLimit, max_concurrency: int,
+                 max_queue: int, priority_shares: Optional[Dict[Priority, float]] = None):
+        self.routes = routes
+        self.default = default
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        shares = priority_shares or DEFAULT_PRIORITY_SHARES
+        self.capacity = {
+            priority: max(1, math.floor(max_concurrency * share)) for priority, share in shares.items()
+        }
+
+        self.in_flight = 0
+        self.waiters: List[_Waiter] = []
+        self._sequence = 0
+
+    def route_for(self, method: str, path: str) -> RouteLimit:
+        for route in self.routes:
+            if route.matches(method, path):
+                return route
+        return self.default
+
+    def _can_admit(self, route: RouteLimit) -> bool:
+        return (route.in_flight < route.max_concurrency
+                and self.in_flight < self.capacity[route.priority])
+
+    async def acquire(self, route: RouteLimit) -> bool:
+        """Wait for a slot for route; return False if the request should be shed"""
+        if len(self.waiters) >= self.max_queue and not self._can_admit(route):
+            # A full queue only turns away requests that nothing queued ranks below
+            lowest = self.waiters[-1] if self.waiters else None
+            if lowest is None or lowest.route.priority <= route.priority:
+                route.rejected_queue_full += 1
+                return False
+            self.waiters.remove(lowest)
+            lowest.future.set_result(False)
+
+        self._sequence += 1
+        waiter = _Waiter(route, self._sequence)
+        self.waiters.append(waiter)
+        self.waiters.sort(key=lambda w: w.sort_key)
+        self._wake()
+
+        queued_at = time.monotonic()
+        if not waiter.future.done():
+            try:
+                await asyncio.wait_for(asyncio.shield(waiter.future), timeout=route.queue_timeout)
+            except asyncio.TimeoutError:
+                if not waiter.future.done():
+                    self.waiters.remove(waiter)
+                    route.rejected_timeout += 1
+                    return False
+                # Otherwise the slot was granted in the same tick the deadline
+                # fired; the request already holds it, so admit it below
+            except asyncio.CancelledError:
+                if not waiter.future.done():
+                    self.waiters.remove(waiter)
+                elif waiter.future.result():
+                    self.release(route)
+                raise
+
+        if not waiter.future.result():
+            route.rejected_evicted += 1
+            return False
+
+        waited = time.monotonic() - queued_at
+        route.admitted += 1
+        route.queue_wait_total += waited
+        route.queue_wait_max = max(route.queue_wait_max, waited)
+        return True
+
+    def release(self, route: RouteLimit):
+        route.in_flight -= 1
+        self.in_flight -= 1
+        self._wake()
+
+    def _wake(self):
+        """Hand free slots to queued requests in priority order"""
+        for waiter in list(self.waiters):
+            route = waiter.route
+            if self._can_admit(route):
+                route.in_flight += 1
+                self.in_flight += 1
+                self.waiters.remove(waiter)
+                waiter.future.set_result(True)
+
+    def metrics(self) -> Dict[str, Any]:
+        routes = self.routes + [self.default]
+        return {
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "queued": len(self.waiters),
+            "rejected": sum(r.rejected_queue_full + r.rejected_timeout + r.rejected_evicted for r in routes),
+            "routes": {route.name: route.metrics() for route in routes},
+        }
+
+
+class AdmissionMiddleware:
+    """ASGI middleware that sheds requests the controller refuses to admit"""
+
+    def __init__(self, app, controller: AdmissionController, exempt_paths: Iterable[str] = ()):
+        self.app = app
+        self.controller = controller
+        self.exempt_paths = set(exempt_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.exempt_paths:
+            await self.app(scope, receive, send)
+            return
+
+        route = self.controller.route_for(scope["method"], scope["path"])
+        if not await self.controller.acquire(route):
+            await self.reject(route, send)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(route)
+
+    @staticmethod
+    async def reject(route: RouteLimit, send):
+        body = json.dumps({"detail": "Server is busy, please retry later"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(route.retry_after).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
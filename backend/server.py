@@ -1,9 +1,14 @@
 from fastapi import FastAPI, APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
 import os
 import logging
+import asyncio
+import base64
+import json
+import zlib
 from pathlib import Path
 from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
@@ -11,6 +16,8 @@ import uuid
 from datetime import datetime, timezone
 import httpx
 
+from admission import AdmissionController, AdmissionMiddleware, Priority, RouteLimit
+
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -20,9 +27,33 @@ mongo_url = os.environ['MONGO_URL']
 client = AsyncIOMotorClient(mongo_url)
 db = client[os.environ['DB_NAME']]
 
+# Upstream API base URLs (overridable for local stand-ins, e.g. benchmarks)
+ALADHAN_API_URL = os.environ.get('ALADHAN_API_URL', 'https://api.aladhan.com/v1')
+ALQURAN_API_URL = os.environ.get('ALQURAN_API_URL', 'https://api.alquran.cloud/v1')
+HADITH_API_URL = os.environ.get('HADITH_API_URL', 'https://hadithapi.com/api')
+
 # Create the main app without a prefix
 app = FastAPI()
 
+# Admission control: per-route concurrency limits and priorities so that
+# slow upstream-backed routes cannot starve prayer times and task updates.
+# Routes are matched in order; anything unmatched falls into "default".
+admission = AdmissionController(
+    routes=[
+        RouteLimit("prayer_times", r"^/api/prayer-times$", Priority.CRITICAL, 64, 2.0),
+        RouteLimit("task_complete", r"^/api/tasks/complete$", Priority.CRITICAL, 64, 2.0, methods=["PUT"]),
+        RouteLimit("tasks", r"^/api/(tasks|progress)(/|$)", Priority.HIGH, 64, 2.0),
+        RouteLimit("export", r"^/api/export/", Priority.LOW, 4, 0.5),
+        RouteLimit("users", r"^/api/users(/|$)", Priority.HIGH, 32, 2.0),
+        RouteLimit("quran", r"^/api/quran/", Priority.NORMAL, 32, 1.0),
+        RouteLimit("hadith", r"^/api/hadith/", Priority.LOW, 16, 0.5),
+        RouteLimit("ai_assistant", r"^/api/ai-assistant$", Priority.LOW, 8, 0.5),
+    ],
+    default=RouteLimit("default", r"", Priority.NORMAL, 64, 1.0),
+    max_concurrency=int(os.environ.get('ADMISSION_MAX_CONCURRENCY', '128')),
+    max_queue=int(os.environ.get('ADMISSION_MAX_QUEUE', '256')),
+)
+
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
 
@@ -102,6 +133,61 @@ def parse_from_mongo(item):
     return item
 
 
+def encode_cursor(position: dict) -> str:
+    """Encode an export position as an opaque resume token"""
+    return base64.urlsafe_b64encode(json.dumps(position, separators=(",", ":")).encode()).decode()
+
+def decode_cursor(cursor: Optional[str]) -> Optional[dict]:
+    """Decode a resume token produced by encode_cursor"""
+    if not cursor:
+        return None
+    try:
+        position = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(position, dict):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return position
+
+def ndjson_line(record_type: str, data: Any, cursor: Optional[str] = None) -> str:
+    """Serialize one export record as a NDJSON line"""
+    record = {"type": record_type, "data": data}
+    if cursor:
+        record["cursor"] = cursor
+    return json.dumps(record, ensure_ascii=False, default=str) + "\n"
+
+async def ndjson_chunks(lines, batch_size: int, compress: bool):
+    """Group NDJSON lines into chunks, gzip-compressing each one if requested.
+
+    Only one batch is held in memory at a time. Compressed chunks are
+    sync-flushed so clients can decode the stream incrementally.
+    """
+    compressor = zlib.compressobj(wbits=31) if compress else None
+    batch = []
+    async for line in lines:
+        batch.append(line)
+        if len(batch) >= batch_size:
+            chunk = "".join(batch).encode()
+            batch = []
+            yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH) if compressor else chunk
+    chunk = "".join(batch).encode()
+    yield compressor.compress(chunk) + compressor.flush() if compressor else chunk
+
+def ndjson_response(lines, filename: str, batch_size: int, compress: bool) -> StreamingResponse:
+    """Stream NDJSON as a download; compressed exports are sent as a .gz file.
+
+    No Content-Encoding is set for gzip, so clients save the compressed
+    bytes instead of transparently decoding them.
+    """
+    if compress:
+        filename += ".gz"
+    return StreamingResponse(
+        ndjson_chunks(lines, batch_size, compress),
+        media_type="application/gzip" if compress else "application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
 # Stub for AI response since emergentintegrations is unavailable
 async def get_ai_response(question: str, user_context: str = "") -> str:
     return "AI assistant functionality is currently unavailable. Please consult a local Islamic scholar."
@@ -111,6 +197,11 @@ async def get_ai_response(question: str, user_context: str = "") -> str:
 async def root():
     return {"message": "Tanbih - Islamic Lifestyle Companion API"}
 
+@api_router.get("/admission/metrics")
+async def get_admission_metrics():
+    """Get admission control state and rejection counters"""
+    return admission.metrics()
+
 @api_router.post("/users", response_model=User)
 async def create_user(user_data: UserCreate):
     """Create new user with onboarding data"""
@@ -150,7 +241,7 @@ async def get_prayer_times(city: str, country: str, date: Optional[str] = None):
     """Get prayer times for specified location"""
     try:
         # Use the timingsByCity endpoint for city-based requests
-        url = f"https://api.aladhan.com/v1/timingsByCity"
+        url = f"{ALADHAN_API_URL}/timingsByCity"
         params = {
             "city": city,
             "country": country,
@@ -189,7 +280,7 @@ async def get_prayer_times(city: str, country: str, date: Optional[str] = None):
 async def get_surahs():
     """Get list of all Surahs"""
     try:
-        url = "https://api.alquran.cloud/v1/surah"
+        url = f"{ALQURAN_API_URL}/surah"
         async with httpx.AsyncClient() as client:
             response = await client.get(url)
             response.raise_for_status()
@@ -203,9 +294,9 @@ async def get_surah(surah_number: int):
     """Get specific Surah with Arabic and English"""
     try:
         # Get Arabic text
-        arabic_url = f"https://api.alquran.cloud/v1/surah/{surah_number}/quran-uthmani"
+        arabic_url = f"{ALQURAN_API_URL}/surah/{surah_number}/quran-uthmani"
         # Get English translation
-        english_url = f"https://api.alquran.cloud/v1/surah/{surah_number}/en.asad"
+        english_url = f"{ALQURAN_API_URL}/surah/{surah_number}/en.asad"
         
         async with httpx.AsyncClient() as client:
             arabic_response = await client.get(arabic_url)
@@ -260,7 +351,7 @@ async def get_hadith_from_collection(collection: str, page: int = 1, limit: int
     """Get Hadith from specific collection"""
     try:
         # Updated endpoint structure for HadithAPI.com
-        url = f"https://hadithapi.com/api/hadiths"
+        url = f"{HADITH_API_URL}/hadiths"
         params = {
             "apiKey": os.environ.get('HADITH_API_KEY'), 
             "book": collection, 
@@ -352,28 +443,119 @@ async def complete_task(task_completion: TaskComplete):
     
     return {"message": "Task updated successfully"}
 
-@api_router.get("/progress/{user_id}")
-async def get_user_progress(user_id: str):
-    """Get user progress statistics"""
-    tasks = await db.tasks.find({"user_id": user_id}).to_list(1000)
-    
-    total_tasks = len(tasks)
-    completed_tasks = len([task for task in tasks if task.get("completed", False)])
+async def calculate_user_progress(user_id: str) -> dict:
+    """Summarize a user's task progress using counts, without loading the tasks"""
+    base_query = {"user_id": user_id}
+    total_tasks = await db.tasks.count_documents(base_query)
+    completed_tasks = await db.tasks.count_documents({**base_query, "completed": True})
     completion_rate = (completed_tasks / total_tasks * 100) if total_tasks > 0 else 0
     
-    # Calculate streaks and other stats
-    daily_tasks = [task for task in tasks if task.get("frequency") == "daily"]
-    weekly_tasks = [task for task in tasks if task.get("frequency") == "weekly"]
-    
     return {
         "total_tasks": total_tasks,
         "completed_tasks": completed_tasks,
         "completion_rate": round(completion_rate, 2),
-        "daily_tasks": len(daily_tasks),
-        "weekly_tasks": len(weekly_tasks),
+        "daily_tasks": await db.tasks.count_documents({**base_query, "frequency": "daily"}),
+        "weekly_tasks": await db.tasks.count_documents({**base_query, "frequency": "weekly"}),
         "streak_days": 0  # TODO: Implement streak calculation
     }
 
+@api_router.get("/progress/{user_id}")
+async def get_user_progress(user_id: str):
+    """Get user progress statistics"""
+    return await calculate_user_progress(user_id)
+
+@api_router.get("/export/users/{user_id}")
+async def export_user_data(
+    user_id: str,
+    cursor: Optional[str] = None,
+    batch_size: int = Query(500, ge=1, le=5000),
+    gzip: bool = False,
+):
+    """Stream a user's profile, progress and tasks as NDJSON.
+
+    Every task line carries a cursor; pass it back to resume after that task.
+    """
+    position = decode_cursor(cursor)
+    if position is None:
+        after_task = None
+    elif isinstance(position.get("task"), str):
+        after_task = position["task"]
+    else:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    user = await db.users.find_one({"id": user_id}, {"_id": 0})
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    async def lines():
+        if after_task is None:
+            yield ndjson_line("user", user)
+            yield ndjson_line("progress", await calculate_user_progress(user_id))
+
+        query = {"user_id": user_id}
+        if after_task is not None:
+            query["id"] = {"$gt": after_task}
+        tasks = db.tasks.find(query, {"_id": 0}).sort("id", 1).batch_size(batch_size)
+        async for task in tasks:
+            yield ndjson_line("task", task, encode_cursor({"task": task["id"]}))
+
+    return ndjson_response(lines(), f"tanbih-{user_id}.ndjson", batch_size, gzip)
+
+@api_router.get("/export/quran")
+async def export_quran(
+    cursor: Optional[str] = None,
+    batch_size: int = Query(500, ge=1, le=5000),
+    gzip: bool = False,
+):
+    """Stream the whole Quran (Arabic and English) as NDJSON, one ayah per line.
+
+    Surahs are fetched one at a time, so memory stays bounded by the largest
+    surah. Every line carries a cursor; pass it back to resume after that ayah.
+    """
+    position = decode_cursor(cursor)
+    if position is None:
+        position = {"surah": 1, "ayah": 0}
+    start_surah = position.get("surah")
+    after_ayah = position.get("ayah")
+    if not all(type(value) is int for value in (start_surah, after_ayah)):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not 1 <= start_surah <= 114 or after_ayah < 0:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    async def lines():
+        skip_through = after_ayah
+        async with httpx.AsyncClient() as client:
+            for surah_number in range(start_surah, 115):
+                try:
+                    arabic_response, english_response = await asyncio.gather(
+                        client.get(f"{ALQURAN_API_URL}/surah/{surah_number}/quran-uthmani"),
+                        client.get(f"{ALQURAN_API_URL}/surah/{surah_number}/en.asad"),
+                    )
+                    arabic_response.raise_for_status()
+                    english_response.raise_for_status()
+                    arabic_ayahs = arabic_response.json()["data"]["ayahs"]
+                    english_ayahs = english_response.json()["data"]["ayahs"]
+                except Exception as e:
+                    # Headers are already sent; end the stream with a resumable error record
+                    logging.error(f"Quran export error: {str(e)}")
+                    resume = encode_cursor({"surah": surah_number, "ayah": skip_through})
+                    yield ndjson_line("error", {"detail": "Unable to fetch Surah", "surah": surah_number}, resume)
+                    return
+
+                for arabic, english in zip(arabic_ayahs, english_ayahs):
+                    if arabic["numberInSurah"] <= skip_through:
+                        continue
+                    yield ndjson_line("ayah", {
+                        "surah": surah_number,
+                        "number": arabic["number"],
+                        "numberInSurah": arabic["numberInSurah"],
+                        "arabic": arabic["text"],
+                        "english": english["text"],
+                    }, encode_cursor({"surah": surah_number, "ayah": arabic["numberInSurah"]}))
+                skip_through = 0
+
+    return ndjson_response(lines(), "quran.ndjson", batch_size, gzip)
+
 async def generate_initial_tasks(user_id: str, user_data: dict):
     """Generate personalized Islamic tasks for new user"""
     base_tasks = [
@@ -438,6 +620,13 @@ async def generate_initial_tasks(user_id: str, user_data: dict):
 # Include the router in the main app
 app.include_router(api_router)
 
+# Added before CORS so that 503 rejections still carry CORS headers
+app.add_middleware(
+    AdmissionMiddleware,
+    controller=admission,
+    exempt_paths=["/api/admission/metrics"],
+)
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
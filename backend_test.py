@@ -204,6 +204,38 @@ class TanbihAPITester:
         
         return result
 
+    def test_export_user_data(self):
+        """Test streaming NDJSON export of user data"""
+        if not self.test_user_id:
+            self.log_test("Export User Data", False, "No user ID available")
+            return None
+        
+        try:
+            response = requests.get(f"{self.api_url}/export/users/{self.test_user_id}", timeout=30)
+            records = [json.loads(line) for line in response.text.splitlines() if line]
+            types = [record['type'] for record in records]
+            success = response.status_code == 200 and types[:2] == ['user', 'progress']
+            self.log_test("Export User Data", success, f"Status: {response.status_code}, Records: {len(records)}")
+            return records if success else None
+        except Exception as e:
+            self.log_test("Export User Data", False, f"Exception: {str(e)}")
+            return None
+
+    def test_admission_metrics(self):
+        """Test admission control metrics API"""
+        result = self.run_test("Admission Metrics", "GET", "admission/metrics", 200)
+        
+        if result:
+            required_fields = ['in_flight', 'queued', 'rejected', 'routes']
+            missing_fields = [field for field in required_fields if field not in result]
+            
+            if missing_fields:
+                self.log_test("Admission Metrics Structure", False, f"Missing fields: {missing_fields}")
+            else:
+                self.log_test("Admission Metrics Structure", True, f"Tracking {len(result['routes'])} route groups")
+        
+        return result
+
     def run_all_tests(self):
         """Run all API tests"""
         print("🚀 Starting Tanbih API Tests...")
@@ -232,6 +264,10 @@ class TanbihAPITester:
         self.test_create_task()
         self.test_get_user_tasks()
         self.test_user_progress()
+        self.test_export_user_data()
+        
+        # Test admission control
+        self.test_admission_metrics()
 
         # Print summary
         print("\n" + "=" * 50)
@@ -0,0 +1,86 @@
+"""Boot the backend app for benchmarking.
+
+Usage: python -m benchmarks.app_server --port 8001 [--mongo memory|local] [--export-tasks N]
+
+Upstream URLs are taken from ALADHAN_API_URL / ALQURAN_API_URL /
+HADITH_API_URL, which the benchmark runner points at the local stand-ins.
+With ``--mongo memory`` the Motor database is swapped for an in-memory one.
+On startup a user with ``--export-tasks`` tasks is seeded under
+``EXPORT_USER_ID`` so the export benchmarks stream a large data set.
+"""
+import argparse
+import logging
+import sys
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+import uvicorn
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+EXPORT_USER_ID = "benchmark-export-user"
+SEED_BATCH_SIZE = 1000
+
+
+async def seed_export_user(db, task_count):
+    """Insert the large export user and its tasks in batches"""
+    now = datetime.now(timezone.utc).isoformat()
+    await db.users.insert_one({
+        "id": EXPORT_USER_ID,
+        "name": "Benchmark Export User",
+        "occupation": "student",
+        "mental_wellness": "peaceful",
+        "daily_habits": ["prayer", "quran"],
+        "location": {"city": "London", "country": "UK"},
+        "language_preference": "english",
+        "prayer_notifications": True,
+        "created_at": now,
+    })
+    for start in range(0, task_count, SEED_BATCH_SIZE):
+        await db.tasks.insert_many([
+            {
+                "id": str(uuid.uuid4()),
+                "user_id": EXPORT_USER_ID,
+                "title": f"Benchmark task {i}",
+                "description": "Seeded task for export benchmarks",
+                "category": ("prayer", "quran", "dhikr", "charity")[i % 4],
+                "frequency": "daily" if i % 3 else "weekly",
+                "completed": i % 2 == 0,
+                "completed_at": now if i % 2 == 0 else None,
+                "created_at": now,
+            }
+            for i in range(start, min(start + SEED_BATCH_SIZE, task_count))
+        ])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--mongo", choices=["memory", "local"], default="memory")
+    parser.add_argument("--export-tasks", type=int, default=0, help="tasks to seed for the export user")
+    args = parser.parse_args()
+
+    import server
+
+    if args.mongo == "memory":
+        from benchmarks.memory_db import InMemoryDatabase
+        server.db = InMemoryDatabase()
+
+    if args.export_tasks:
+        # Seed on the server's own event loop so the Motor client is bound to it
+        async def seed():
+            await seed_export_user(server.db, args.export_tasks)
+
+        server.app.add_event_handler("startup", seed)
+
+    # Per-request upstream logging would dominate the profile under load
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    uvicorn.run(server.app, host=args.host, port=args.port, log_level="warning", access_log=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""Local stand-ins for the aladhan, alquran and hadithapi services.
+
+Serves deterministic payloads shaped like the real APIs, with artificial
+latency controlled by the environment:
+
+    BENCH_UPSTREAM_LATENCY_MS  mean delay added to every response (default 50)
+    BENCH_UPSTREAM_JITTER_MS   +/- uniform jitter around the mean (default 10)
+
+Run with ``uvicorn benchmarks.fake_upstreams:app``; the routes are mounted
+under ``/aladhan``, ``/alquran`` and ``/hadith`` so one process can stand in
+for all three services.
+"""
+import asyncio
+import os
+import random
+
+from fastapi import FastAPI, HTTPException
+
+LATENCY_MS = float(os.environ.get("BENCH_UPSTREAM_LATENCY_MS", "50"))
+JITTER_MS = float(os.environ.get("BENCH_UPSTREAM_JITTER_MS", "10"))
+
+# Number of ayahs in each surah, in order
+AYAH_COUNTS = [
+    7, 286, 200, 176, 120, 165, 206, 75, 129, 109, 123, 111, 43, 52, 99, 128,
+    111, 110, 98, 135, 112, 78, 118, 64, 77, 227, 93, 88, 69, 60, 34, 30, 73,
+    54, 45, 83, 182, 88, 75, 85, 54, 53, 89, 59, 37, 35, 38, 29, 18, 45, 60,
+    49, 62, 55, 78, 96, 29, 22, 24, 13, 14, 11, 11, 18, 12, 12, 30, 52, 52,
+    44, 28, 28, 20, 56, 40, 31, 50, 40, 46, 42, 29, 19, 36, 25, 22, 17, 19,
+    26, 30, 20, 15, 21, 11, 8, 8, 19, 5, 8, 8, 11, 11, 8, 3, 9, 5, 4, 7, 3,
+    6, 3, 5, 4, 5, 6,
+]
+
+app = FastAPI()
+
+
+async def simulate_latency():
+    """Sleep for the configured upstream latency"""
+    delay = max(0.0, LATENCY_MS + random.uniform(-JITTER_MS, JITTER_MS))
+    await asyncio.sleep(delay / 1000)
+
+
+def surah_meta(number: int):
+    return {
+        "number": number,
+        "name": f"سورة {number}",
+        "englishName": f"Surah {number}",
+        "englishNameTranslation": f"Chapter {number}",
+        "numberOfAyahs": AYAH_COUNTS[number - 1],
+        "revelationType": "Meccan" if number % 2 else "Medinan",
+    }
+
+
+@app.get("/aladhan/timingsByCity")
+async def timings_by_city(city: str, country: str, method: int = 2, school: int = 0, date: str = None):
+    await simulate_latency()
+    return {
+        "code": 200,
+        "status": "OK",
+        "data": {
+            "timings": {
+                "Fajr": "05:12",
+                "Sunrise": "06:34",
+                "Dhuhr": "12:48",
+                "Asr": "16:10",
+                "Maghrib": "19:01",
+                "Isha": "20:22",
+            },
+            "date": {"readable": date or "01 Jan 2025"},
+        },
+    }
+
+
+@app.get("/alquran/surah")
+async def list_surahs():
+    await simulate_latency()
+    return {
+        "code": 200,
+        "status": "OK",
+        "data": [surah_meta(number) for number in range(1, len(AYAH_COUNTS) + 1)],
+    }
+
+
+@app.get("/alquran/surah/{surah_number}/{edition}")
+async def surah_edition(surah_number: int, edition: str):
+    if not 1 <= surah_number <= len(AYAH_COUNTS):
+        raise HTTPException(status_code=404, detail="Surah not found")
+    await simulate_latency()
+
+    offset = sum(AYAH_COUNTS[:surah_number - 1])
+    ayahs = [
+        {
+            "number": offset + i,
+            "text": f"[{edition}] {surah_number}:{i} " + "lorem ipsum " * 8,
+            "numberInSurah": i,
+        }
+        for i in range(1, AYAH_COUNTS[surah_number - 1] + 1)
+    ]
+    data = surah_meta(surah_number)
+    data["ayahs"] = ayahs
+    data["edition"] = {"identifier": edition}
+    return {"code": 200, "status": "OK", "data": data}
+
+
+@app.get("/hadith/hadiths")
+async def hadiths(book: str, page: int = 1, language: str = "en", apiKey: str = None):
+    await simulate_latency()
+    per_page = 25
+    start = (page - 1) * per_page
+    return {
+        "status": 200,
+        "hadiths": {
+            "current_page": page,
+            "per_page": per_page,
+            "data": [
+                {
+                    "id": start + i,
+                    "hadithNumber": str(start + i),
+                    "bookSlug": book,
+                    "hadithEnglish": f"Hadith {start + i} of {book}. " + "lorem ipsum " * 12,
+                    "englishNarrator": "Narrated by a companion",
+                }
+                for i in range(1, per_page + 1)
+            ],
+        },
+    }
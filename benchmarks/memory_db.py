@@ -0,0 +1,153 @@
+"""In-memory stand-in for the Motor database used by the backend.
+
+Implements only the subset of the Motor API that ``server.py`` relies on,
+so benchmarks can run without a MongoDB instance.
+"""
+import copy
+import uuid
+
+
+OPERATORS = {
+    "$gt": lambda value, operand: value is not None and value > operand,
+    "$gte": lambda value, operand: value is not None and value >= operand,
+    "$lt": lambda value, operand: value is not None and value < operand,
+    "$lte": lambda value, operand: value is not None and value <= operand,
+}
+
+
+def _matches(document, query):
+    """Return True if document satisfies an equality or simple operator query"""
+    for key, condition in query.items():
+        value = document.get(key)
+        if isinstance(condition, dict):
+            if not all(OPERATORS[op](value, operand) for op, operand in condition.items()):
+                return False
+        elif value != condition:
+            return False
+    return True
+
+
+def _project(document, projection):
+    document = copy.deepcopy(document)
+    for key, include in (projection or {}).items():
+        if not include:
+            document.pop(key, None)
+    return document
+
+
+class UpdateResult:
+    def __init__(self, matched_count, modified_count):
+        self.matched_count = matched_count
+        self.modified_count = modified_count
+
+
+class InsertOneResult:
+    def __init__(self, inserted_id):
+        self.inserted_id = inserted_id
+
+
+class InsertManyResult:
+    def __init__(self, inserted_ids):
+        self.inserted_ids = inserted_ids
+
+
+class InMemoryCursor:
+    def __init__(self, documents, projection=None):
+        self._documents = documents
+        self._projection = projection
+
+    def sort(self, key, direction=1):
+        self._documents.sort(key=lambda d: d.get(key), reverse=direction < 0)
+        return self
+
+    def batch_size(self, size):
+        return self
+
+    async def to_list(self, length):
+        documents = self._documents if length is None else self._documents[:length]
+        return [_project(document, self._projection) for document in documents]
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for document in self._documents:
+            yield _project(document, self._projection)
+
+
+class InMemoryCollection:
+    # Fields looked up by equality on hot paths, indexed like they would be in Mongo
+    INDEXED_FIELDS = ("id", "user_id")
+
+    def __init__(self):
+        self._documents = []
+        self._indexes = {field: {} for field in self.INDEXED_FIELDS}
+
+    def _index(self, document):
+        for field, index in self._indexes.items():
+            index.setdefault(document.get(field), []).append(document)
+
+    def _unindex(self, document):
+        for field, index in self._indexes.items():
+            bucket = index[document.get(field)]
+            bucket[:] = [d for d in bucket if d is not document]
+
+    def _candidates(self, query):
+        """Documents that may match query, narrowed by an index when possible"""
+        for field, index in self._indexes.items():
+            value = query.get(field)
+            if value is not None and not isinstance(value, dict):
+                return index.get(value, [])
+        return self._documents
+
+    async def insert_one(self, document):
+        document.setdefault("_id", uuid.uuid4().hex)
+        stored = copy.deepcopy(document)
+        self._documents.append(stored)
+        self._index(stored)
+        return InsertOneResult(document["_id"])
+
+    async def insert_many(self, documents):
+        inserted_ids = []
+        for document in documents:
+            inserted_ids.append((await self.insert_one(document)).inserted_id)
+        return InsertManyResult(inserted_ids)
+
+    async def find_one(self, query, projection=None):
+        for document in self._candidates(query):
+            if _matches(document, query):
+                return _project(document, projection)
+        return None
+
+    def find(self, query=None, projection=None):
+        query = query or {}
+        return InMemoryCursor([d for d in self._candidates(query) if _matches(d, query)], projection)
+
+    async def count_documents(self, query):
+        return sum(1 for document in self._candidates(query) if _matches(document, query))
+
+    async def update_one(self, query, update):
+        for document in self._candidates(query):
+            if _matches(document, query):
+                changes = copy.deepcopy(update.get("$set", {}))
+                reindex = any(field in changes for field in self._indexes)
+                if reindex:
+                    self._unindex(document)
+                document.update(changes)
+                if reindex:
+                    self._index(document)
+                return UpdateResult(1, 1)
+        return UpdateResult(0, 0)
+
+
+class InMemoryDatabase:
+    def __init__(self):
+        self._collections = {}
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self._collections.setdefault(name, InMemoryCollection())
+
+    def __getitem__(self, name):
+        return getattr(self, name)
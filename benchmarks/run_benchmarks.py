@@ -0,0 +1,457 @@
+"""Load-test and benchmark suite for the Tanbih backend.
+
+Boots the FastAPI app against an in-memory (or local) Mongo and local
+stand-ins for the aladhan/alquran/hadithapi services, drives concurrent
+async load at every endpoint and reports RPS and latency percentiles of
+admitted requests, the share of requests shed with 503, and how much the
+server's RSS grew during each endpoint's run. Results are compared with stored baselines so
+regressions fail the run.
+
+    python -m benchmarks.run_benchmarks                     # compare with baselines
+    python -m benchmarks.run_benchmarks --update-baseline   # record new baselines
+    python -m benchmarks.run_benchmarks -e tasks -e prayer_times -c 64 -n 2000
+
+Results are only compared with a baseline recorded with the same config,
+including the selected endpoints: scenarios share one data store, so an
+endpoint's numbers depend on which scenarios ran before it.
+"""
+import argparse
+import asyncio
+import base64
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+from benchmarks.app_server import EXPORT_USER_ID
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+BACKEND_ENV = REPO_ROOT / "backend" / ".env"
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "baselines.json"
+
+# Metrics compared against baselines: (larger is better, absolute slack).
+# The slack keeps near-zero baselines from flagging on noise.
+COMPARED_METRICS = {
+    "rps": (True, 0.0),
+    "p95_ms": (False, 0.0),
+    "p99_ms": (False, 0.0),
+    "rss_growth_mb": (False, 5.0),
+    "shed_rate": (False, 0.01),
+}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def read_rss_mb(pid):
+    """Resident set size of a process in MB (Linux /proc only)"""
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return 0.0
+
+
+def export_cursor(position):
+    """Resume cursor in the format the export endpoints hand out"""
+    return base64.urlsafe_b64encode(json.dumps(position, separators=(",", ":")).encode()).decode()
+
+
+class Scenario:
+    """One endpoint under load; requests/concurrency/warmup cap the CLI values.
+
+    warmup_params replaces params for warmup requests, for endpoints whose
+    full request would already grow the heap and hide what the timed run uses.
+    """
+
+    def __init__(self, name, method, path, params=None, json_body=None,
+                 requests=None, concurrency=None, warmup=None, warmup_params=None):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.params = params
+        self.json_body = json_body
+        self.requests = requests
+        self.concurrency = concurrency
+        self.warmup = warmup
+        self.warmup_params = warmup_params
+
+
+class BenchmarkRunner:
+    def __init__(self, args):
+        self.args = args
+        self.upstream_port = free_port()
+        self.app_port = free_port()
+        self.base_url = f"http://127.0.0.1:{self.app_port}"
+        self.processes = []
+        self.app_process = None
+        # Throwaway database for --mongo local, dropped on shutdown
+        self.db_name = f"tanbih_bench_{os.getpid()}"
+        self.user_id = None
+        self.task_id = None
+
+    # Process management
+    def start_processes(self):
+        upstream_url = f"http://127.0.0.1:{self.upstream_port}"
+        upstream_env = dict(
+            os.environ,
+            BENCH_UPSTREAM_LATENCY_MS=str(self.args.latency_ms),
+            BENCH_UPSTREAM_JITTER_MS=str(self.args.jitter_ms),
+        )
+        self.processes.append(subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "benchmarks.fake_upstreams:app",
+             "--host", "127.0.0.1", "--port", str(self.upstream_port),
+             "--log-level", "warning", "--no-access-log"],
+            cwd=REPO_ROOT, env=upstream_env,
+        ))
+
+        app_env = dict(
+            os.environ,
+            ALADHAN_API_URL=f"{upstream_url}/aladhan",
+            ALQURAN_API_URL=f"{upstream_url}/alquran",
+            HADITH_API_URL=f"{upstream_url}/hadith",
+            DB_NAME=self.db_name,
+        )
+        self.app_process = subprocess.Popen(
+            [sys.executable, "-m", "benchmarks.app_server",
+             "--port", str(self.app_port), "--mongo", self.args.mongo,
+             "--export-tasks", str(self.args.export_tasks)],
+            cwd=REPO_ROOT, env=app_env,
+        )
+        self.processes.append(self.app_process)
+
+    def stop_processes(self):
+        for process in self.processes:
+            process.terminate()
+        for process in self.processes:
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        if self.args.mongo == "local":
+            self.drop_database()
+
+    def drop_database(self):
+        from dotenv import dotenv_values
+        from pymongo import MongoClient
+
+        mongo_url = os.environ.get("MONGO_URL") or dotenv_values(BACKEND_ENV)["MONGO_URL"]
+        client = MongoClient(mongo_url, serverSelectionTimeoutMS=5000)
+        try:
+            client.drop_database(self.db_name)
+        except Exception as e:
+            print(f"⚠️  Could not drop benchmark database {self.db_name}: {e}")
+        finally:
+            client.close()
+
+    async def wait_until_ready(self, client, url, process, timeout=30):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise RuntimeError(f"Process serving {url} exited with code {process.returncode}")
+            try:
+                await client.get(url)
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.2)
+        raise RuntimeError(f"Timed out waiting for {url}")
+
+    # Fixtures
+    async def seed(self, client):
+        """Create a user (and its initial tasks) for the per-user endpoints"""
+        response = await client.post(f"{self.base_url}/api/users", json=self.user_payload())
+        response.raise_for_status()
+        self.user_id = response.json()["id"]
+        response = await client.get(f"{self.base_url}/api/tasks/{self.user_id}")
+        response.raise_for_status()
+        self.task_id = response.json()[0]["id"]
+
+    @staticmethod
+    def user_payload():
+        return {
+            "name": "Benchmark User",
+            "occupation": "student",
+            "mental_wellness": "stressed",
+            "daily_habits": ["prayer", "quran"],
+            "location": {"city": "London", "country": "UK"},
+            "language_preference": "english",
+            "prayer_notifications": True,
+        }
+
+    def scenarios(self):
+        return [
+            Scenario("root", "GET", "/api/"),
+            # Heavy streaming exports run first, before other scenarios grow the
+            # heap and mask buffering, and at the export route's admission limit
+            # so they measure per-export cost and memory rather than shedding.
+            # The Quran warmup only streams the last surah: it sets up each
+            # export's upstream client without holding a whole export in memory
+            Scenario("export_user", "GET", f"/api/export/users/{EXPORT_USER_ID}",
+                     requests=20, concurrency=4, warmup=1),
+            Scenario("export_quran", "GET", "/api/export/quran",
+                     requests=4, concurrency=4, warmup=4,
+                     warmup_params={"cursor": export_cursor({"surah": 114, "ayah": 0})}),
+            Scenario("create_user", "POST", "/api/users", json_body=self.user_payload()),
+            Scenario("get_user", "GET", f"/api/users/{self.user_id}"),
+            Scenario("prayer_times", "GET", "/api/prayer-times", params={"city": "London", "country": "UK"}),
+            Scenario("quran_surahs", "GET", "/api/quran/surahs"),
+            Scenario("quran_surah", "GET", "/api/quran/surah/2"),
+            Scenario("hadith_collections", "GET", "/api/hadith/collections"),
+            Scenario("hadith", "GET", "/api/hadith/sahih-bukhari"),
+            Scenario("duas", "GET", "/api/duas"),
+            Scenario("ai_assistant", "POST", "/api/ai-assistant",
+                     json_body={"question": "What is the importance of prayer?", "user_id": self.user_id}),
+            Scenario("tasks", "GET", f"/api/tasks/{self.user_id}"),
+            Scenario("task_complete", "PUT", "/api/tasks/complete",
+                     json_body={"task_id": self.task_id, "completed": True}),
+            Scenario("progress", "GET", f"/api/progress/{self.user_id}"),
+        ]
+
+    # Load generation
+    async def run_scenario(self, client, scenario):
+        url = f"{self.base_url}{scenario.path}"
+        latencies = []
+        statuses = {}
+        remaining = min(self.args.requests, scenario.requests or self.args.requests)
+        concurrency = min(self.args.concurrency, scenario.concurrency or self.args.concurrency)
+        warmup = min(self.args.warmup, self.args.warmup if scenario.warmup is None else scenario.warmup)
+
+        async def send():
+            start = time.perf_counter()
+            try:
+                response = await client.request(scenario.method, url, params=scenario.params, json=scenario.json_body)
+                status = response.status_code
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            # Shed requests fail fast; timing them would flatter rps and latency
+            if status != 503:
+                latencies.append((time.perf_counter() - start) * 1000)
+            statuses[status] = statuses.get(status, 0) + 1
+
+        async def worker():
+            nonlocal remaining
+            while remaining > 0:
+                remaining -= 1
+                await send()
+
+        # Warmup runs at the timed concurrency; failures are counted apart
+        # from the timed run, never fatal
+        warmup_remaining = warmup
+        warmup_errors = 0
+        warmup_params = scenario.warmup_params or scenario.params
+
+        async def warmup_worker():
+            nonlocal warmup_remaining, warmup_errors
+            while warmup_remaining > 0:
+                warmup_remaining -= 1
+                try:
+                    response = await client.request(scenario.method, url, params=warmup_params,
+                                                    json=scenario.json_body)
+                    warmup_errors += response.status_code >= 400 and response.status_code != 503
+                except httpx.HTTPError:
+                    warmup_errors += 1
+
+        await asyncio.gather(*(warmup_worker() for _ in range(concurrency)))
+
+        # The server process is shared by all scenarios, so measure growth from here
+        start_rss = read_rss_mb(self.app_process.pid)
+        peak_rss = start_rss
+        sampling = True
+
+        async def sample_rss():
+            nonlocal peak_rss
+            while sampling:
+                peak_rss = max(peak_rss, read_rss_mb(self.app_process.pid))
+                await asyncio.sleep(0.05)
+
+        sampler = asyncio.create_task(sample_rss())
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+        sampling = False
+        await sampler
+
+        latencies.sort()
+        # 503s are load shedding by admission control, not failures
+        shed = statuses.get(503, 0)
+        errors = sum(count for status, count in statuses.items()
+                     if not (isinstance(status, int) and status < 400)) - shed
+        total = sum(statuses.values())
+        return {
+            "requests": total,
+            "errors": errors,
+            "warmup_errors": warmup_errors,
+            "shed": shed,
+            "shed_rate": round(shed / total, 4) if total else 0.0,
+            "statuses": {str(status): count for status, count in statuses.items()},
+            "rps": round(len(latencies) / elapsed, 2),
+            "p50_ms": round(percentile(latencies, 50), 2),
+            "p95_ms": round(percentile(latencies, 95), 2),
+            "p99_ms": round(percentile(latencies, 99), 2),
+            "start_rss_mb": round(start_rss, 2),
+            "rss_growth_mb": round(peak_rss - start_rss, 2),
+        }
+
+    def selected(self, scenario):
+        return not self.args.endpoint or scenario.name in self.args.endpoint
+
+    async def run(self):
+        limits = httpx.Limits(max_connections=self.args.concurrency, max_keepalive_connections=self.args.concurrency)
+        async with httpx.AsyncClient(limits=limits, timeout=self.args.timeout) as client:
+            await self.wait_until_ready(client, f"http://127.0.0.1:{self.upstream_port}/docs", self.processes[0])
+            await self.wait_until_ready(client, f"{self.base_url}/api/", self.app_process)
+            await self.seed(client)
+
+            results = {}
+            for scenario in self.scenarios():
+                if not self.selected(scenario):
+                    continue
+                results[scenario.name] = await self.run_scenario(client, scenario)
+                self.print_result(scenario.name, results[scenario.name])
+            return results
+
+    # Reporting
+    def config(self):
+        # Scenarios share one data store, so results depend on which ones ran
+        return {
+            "endpoints": [scenario.name for scenario in self.scenarios() if self.selected(scenario)],
+            "concurrency": self.args.concurrency,
+            "requests": self.args.requests,
+            "latency_ms": self.args.latency_ms,
+            "jitter_ms": self.args.jitter_ms,
+            "mongo": self.args.mongo,
+            "export_tasks": self.args.export_tasks,
+        }
+
+    @staticmethod
+    def print_header():
+        print(f"{'endpoint':<20}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'+rss MB':>10}{'shed %':>8}{'errors':>8}")
+        print("-" * 86)
+
+    @staticmethod
+    def print_result(name, result):
+        print(f"{name:<20}{result['rps']:>10.1f}{result['p50_ms']:>10.1f}{result['p95_ms']:>10.1f}"
+              f"{result['p99_ms']:>10.1f}{result['rss_growth_mb']:>10.1f}{result['shed_rate'] * 100:>8.1f}{result['errors']:>8}")
+        if result["warmup_errors"]:
+            print(f"{'':<20}⚠️  {result['warmup_errors']} warmup requests failed")
+
+    def compare(self, results, baseline):
+        """Return a list of human readable regressions against the baseline"""
+        tolerance = self.args.tolerance
+        regressions = []
+        for name, result in results.items():
+            if result["errors"]:
+                regressions.append(f"{name}: {result['errors']} failed requests {result['statuses']}")
+            expected = baseline.get("endpoints", {}).get(name)
+            if not expected:
+                continue
+            for metric, (higher_is_better, slack) in COMPARED_METRICS.items():
+                if metric not in expected:
+                    continue
+                if higher_is_better and result[metric] < expected[metric] * (1 - tolerance) - slack:
+                    regressions.append(f"{name}: {metric} {result[metric]} < baseline {expected[metric]}")
+                elif not higher_is_better and result[metric] > expected[metric] * (1 + tolerance) + slack:
+                    regressions.append(f"{name}: {metric} {result[metric]} > baseline {expected[metric]}")
+        return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Tanbih backend load-test and benchmark suite")
+    parser.add_argument("-c", "--concurrency", type=int, default=32, help="concurrent in-flight requests")
+    parser.add_argument("-n", "--requests", type=int, default=500, help="requests per endpoint")
+    parser.add_argument("--warmup", type=int, default=10, help="untimed requests per endpoint")
+    parser.add_argument("--latency-ms", type=float, default=50, help="mean upstream latency")
+    parser.add_argument("--jitter-ms", type=float, default=10, help="upstream latency jitter")
+    parser.add_argument("--mongo", choices=["memory", "local"], default="memory",
+                        help="in-memory stand-in or a throwaway database at the MONGO_URL from backend/.env")
+    parser.add_argument("--export-tasks", type=int, default=50000,
+                        help="tasks seeded for the user streamed by the export_user scenario")
+    parser.add_argument("--timeout", type=float, default=30, help="client timeout in seconds")
+    parser.add_argument("-e", "--endpoint", action="append", help="only run the named endpoint (repeatable)")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--update-baseline", action="store_true", help="store this run as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative deviation from baseline")
+    parser.add_argument("--output", type=Path, help="write raw results as JSON")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    runner = BenchmarkRunner(args)
+
+    print("🚀 Starting Tanbih benchmarks...")
+    print(f"Config: {runner.config()}")
+    print("=" * 86)
+    runner.print_header()
+
+    runner.start_processes()
+    try:
+        results = asyncio.run(runner.run())
+    finally:
+        runner.stop_processes()
+
+    if args.output:
+        args.output.write_text(json.dumps({"config": runner.config(), "endpoints": results}, indent=2))
+
+    baseline = json.loads(args.baseline.read_text()) if args.baseline.exists() else None
+    mismatched = sorted(
+        key for key in set(runner.config()) | set(baseline["config"])
+        if runner.config().get(key) != baseline["config"].get(key)
+    ) if baseline else []
+
+    if args.update_baseline:
+        # A baseline is always one whole run; never merge a partial run into it
+        if args.endpoint and "endpoints" in mismatched:
+            print(f"\n❌ Refusing to overwrite the baseline for {baseline['config']['endpoints']} "
+                  f"with a run of {runner.config()['endpoints']}; rerun without -e or pass --baseline")
+            return 2
+        endpoints = {
+            name: {key: result[key] for key in ("rps", "p50_ms", "p95_ms", "p99_ms", "rss_growth_mb", "shed_rate")}
+            for name, result in results.items()
+        }
+        args.baseline.write_text(json.dumps({"config": runner.config(), "endpoints": endpoints}, indent=2) + "\n")
+        print(f"\n💾 Baseline written to {args.baseline}")
+        return 0
+
+    if baseline is None:
+        print(f"\n⚠️  No baseline at {args.baseline}; run with --update-baseline to record one")
+        return 0
+
+    if mismatched:
+        print("\n❌ Baseline config mismatch, results not compared:")
+        for key in mismatched:
+            print(f"  - {key}: baseline {baseline['config'].get(key)}, this run {runner.config().get(key)}")
+        return 2
+
+    regressions = runner.compare(results, baseline)
+    print("\n" + "=" * 86)
+    if regressions:
+        print(f"❌ Regressions ({len(regressions)}):")
+        for regression in regressions:
+            print(f"  - {regression}")
+        return 1
+    print("✅ No regressions against baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
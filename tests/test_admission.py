@@ -0,0 +1,218 @@
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from admission import AdmissionController, Priority, RouteLimit  # noqa: E402
+
+EQUAL_SHARES = {priority: 1.0 for priority in Priority}
+
+
+def make_controller(max_concurrency=1, max_queue=10, priority_shares=EQUAL_SHARES):
+    routes = {
+        "critical": RouteLimit("critical", r"^/critical", Priority.CRITICAL, 100, 1.0),
+        "normal": RouteLimit("normal", r"^/normal", Priority.NORMAL, 100, 1.0),
+        "low": RouteLimit("low", r"^/low", Priority.LOW, 100, 1.0),
+    }
+    default = RouteLimit("default", r"", Priority.NORMAL, 100, 1.0)
+    controller = AdmissionController(list(routes.values()), default, max_concurrency, max_queue, priority_shares)
+    return controller, routes
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_route_for_matches_in_order_and_falls_back_to_default():
+    controller, routes = make_controller()
+    assert controller.route_for("GET", "/critical/x") is routes["critical"]
+    assert controller.route_for("GET", "/other") is controller.default
+
+
+def test_admits_immediately_when_capacity_is_free():
+    async def scenario():
+        controller, routes = make_controller(max_concurrency=2)
+        assert await controller.acquire(routes["low"])
+        assert await controller.acquire(routes["critical"])
+        assert controller.in_flight == 2
+        controller.release(routes["low"])
+        controller.release(routes["critical"])
+        assert controller.in_flight == 0
+
+    asyncio.run(scenario())
+
+
+def test_lower_priorities_are_capped_at_their_share():
+    async def scenario():
+        controller, routes = make_controller(max_concurrency=4, priority_shares={
+            Priority.CRITICAL: 1.0, Priority.HIGH: 1.0, Priority.NORMAL: 1.0, Priority.LOW: 0.5,
+        })
+        routes["low"].queue_timeout = 0.01
+        assert await controller.acquire(routes["low"])
+        assert await controller.acquire(routes["low"])
+        assert not await controller.acquire(routes["low"])
+        assert await controller.acquire(routes["critical"])
+
+    asyncio.run(scenario())
+
+
+def test_queued_requests_are_admitted_in_priority_order():
+    async def scenario():
+        controller, routes = make_controller()
+        assert await controller.acquire(routes["critical"])
+
+        order = []
+
+        async def request(name):
+            assert await controller.acquire(routes[name])
+            order.append(name)
+            controller.release(routes[name])
+
+        tasks = [asyncio.create_task(request(name)) for name in ("low", "normal", "critical")]
+        await settle()
+        assert order == []
+
+        controller.release(routes["critical"])
+        await asyncio.gather(*tasks)
+        assert order == ["critical", "normal", "low"]
+        assert controller.in_flight == 0
+
+    asyncio.run(scenario())
+
+
+def test_queue_deadline_rejects_and_dequeues():
+    async def scenario():
+        controller, routes = make_controller()
+        routes["low"].queue_timeout = 0.01
+        assert await controller.acquire(routes["critical"])
+
+        assert not await controller.acquire(routes["low"])
+        assert routes["low"].rejected_timeout == 1
+        assert controller.waiters == []
+        assert controller.in_flight == 1
+
+    asyncio.run(scenario())
+
+
+def test_slot_granted_as_deadline_fires_is_admitted():
+    async def scenario():
+        controller, routes = make_controller()
+        assert await controller.acquire(routes["critical"])
+
+        async def wait_for_then_time_out(awaitable, timeout):
+            # The slot arrives, but the deadline is reported in the same tick
+            await awaitable
+            raise asyncio.TimeoutError
+
+        waiting = asyncio.create_task(controller.acquire(routes["low"]))
+        original_wait_for = asyncio.wait_for
+        asyncio.wait_for = wait_for_then_time_out
+        try:
+            await settle()
+            controller.release(routes["critical"])
+            assert await waiting is True
+        finally:
+            asyncio.wait_for = original_wait_for
+
+        assert routes["low"].rejected_timeout == 0
+        assert routes["low"].admitted == 1
+        assert controller.in_flight == 1
+
+    asyncio.run(scenario())
+
+
+def test_full_queue_evicts_lowest_priority_waiter():
+    async def scenario():
+        controller, routes = make_controller(max_queue=2)
+        assert await controller.acquire(routes["critical"])
+
+        first_low = asyncio.create_task(controller.acquire(routes["low"]))
+        await settle()
+        second_low = asyncio.create_task(controller.acquire(routes["low"]))
+        await settle()
+        critical = asyncio.create_task(controller.acquire(routes["critical"]))
+        await settle()
+
+        # The most recently queued of the lowest-priority waiters is shed
+        assert await second_low is False
+        assert routes["low"].rejected_evicted == 1
+        assert routes["critical"].rejected_queue_full == 0
+        assert len(controller.waiters) == 2
+
+        controller.release(routes["critical"])
+        assert await critical is True
+        controller.release(routes["critical"])
+        assert await first_low is True
+
+    asyncio.run(scenario())
+
+
+def test_full_queue_rejects_request_that_outranks_nothing():
+    async def scenario():
+        controller, routes = make_controller(max_queue=1)
+        assert await controller.acquire(routes["critical"])
+
+        queued = asyncio.create_task(controller.acquire(routes["normal"]))
+        await settle()
+        assert not await controller.acquire(routes["normal"])
+        assert not await controller.acquire(routes["low"])
+        assert routes["normal"].rejected_queue_full == 1
+        assert routes["low"].rejected_queue_full == 1
+
+        controller.release(routes["critical"])
+        assert await queued is True
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_waiter_leaves_queue_without_taking_a_slot():
+    async def scenario():
+        controller, routes = make_controller()
+        assert await controller.acquire(routes["critical"])
+
+        waiting = asyncio.create_task(controller.acquire(routes["low"]))
+        await settle()
+        waiting.cancel()
+        await asyncio.gather(waiting, return_exceptions=True)
+
+        assert controller.waiters == []
+        controller.release(routes["critical"])
+        assert controller.in_flight == 0
+
+    asyncio.run(scenario())
+
+
+def test_cancellation_racing_wakeup_does_not_leak_the_slot():
+    async def scenario():
+        controller, routes = make_controller()
+        assert await controller.acquire(routes["critical"])
+
+        waiting = asyncio.create_task(controller.acquire(routes["low"]))
+        await settle()
+        # Slot is handed over in the same tick the waiter is cancelled
+        waiting.cancel()
+        controller.release(routes["critical"])
+        result, = await asyncio.gather(waiting, return_exceptions=True)
+        if result is True:
+            # wait_for may deliver the result instead of the cancellation
+            controller.release(routes["low"])
+
+        assert controller.in_flight == 0
+        assert routes["low"].in_flight == 0
+
+    asyncio.run(scenario())
+
+
+def test_metrics_report_rejections():
+    async def scenario():
+        controller, routes = make_controller(max_queue=0)
+        assert await controller.acquire(routes["critical"])
+        assert not await controller.acquire(routes["low"])
+        metrics = controller.metrics()
+        assert metrics["rejected"] == 1
+        assert metrics["routes"]["low"]["rejected_queue_full"] == 1
+        assert metrics["routes"]["critical"]["in_flight"] == 1
+
+    asyncio.run(scenario())
@@ -0,0 +1,144 @@
+import asyncio
+import base64
+import gzip
+import json
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+import server  # noqa: E402
+from benchmarks.memory_db import InMemoryDatabase  # noqa: E402
+
+USER = {
+    "name": "Export User",
+    "occupation": "teacher",
+    "mental_wellness": "peaceful",
+    "daily_habits": ["prayer"],
+    "location": {"city": "London", "country": "UK"},
+}
+
+MALFORMED_CURSORS = [
+    "e30=",  # {}
+    "W10=",  # []
+    "not base64!",
+]
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(server, "db", InMemoryDatabase())
+    with TestClient(server.app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def user_id(client):
+    user_id = client.post("/api/users", json=USER).json()["id"]
+    for i in range(10):
+        client.post("/api/tasks", json={
+            "user_id": user_id,
+            "title": f"Task {i}",
+            "description": "Export test task",
+            "category": "dhikr",
+            "frequency": "daily",
+        })
+    return user_id
+
+
+def records(response):
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def decode(cursor):
+    return json.loads(base64.urlsafe_b64decode(cursor))
+
+
+def test_export_user_streams_profile_progress_then_tasks(client, user_id):
+    response = client.get(f"/api/export/users/{user_id}")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+
+    lines = records(response)
+    assert [line["type"] for line in lines[:2]] == ["user", "progress"]
+    assert lines[0]["data"]["id"] == user_id
+    assert lines[1]["data"] == client.get(f"/api/progress/{user_id}").json()
+
+    tasks = lines[2:]
+    assert all(line["type"] == "task" for line in tasks)
+    assert len(tasks) == lines[1]["data"]["total_tasks"]
+    task_ids = [line["data"]["id"] for line in tasks]
+    assert task_ids == sorted(task_ids)
+    assert all("_id" not in line["data"] for line in tasks)
+
+
+def test_export_user_resumes_after_task_cursor(client, user_id):
+    tasks = records(client.get(f"/api/export/users/{user_id}"))[2:]
+
+    for n in (0, 4, len(tasks) - 1):
+        resumed = records(client.get(f"/api/export/users/{user_id}", params={"cursor": tasks[n]["cursor"]}))
+        assert resumed == tasks[n + 1:]
+
+
+def test_export_user_gzip_matches_plain_body(client, user_id):
+    plain = client.get(f"/api/export/users/{user_id}", params={"batch_size": 3})
+    compressed = client.get(f"/api/export/users/{user_id}", params={"batch_size": 3, "gzip": "true"})
+
+    assert compressed.headers["content-type"] == "application/gzip"
+    assert "content-encoding" not in compressed.headers
+    assert compressed.headers["content-disposition"].endswith('.ndjson.gz"')
+    assert gzip.decompress(compressed.content) == plain.content
+
+
+def test_export_user_unknown_user_is_404(client):
+    assert client.get("/api/export/users/missing").status_code == 404
+
+
+@pytest.mark.parametrize("cursor", MALFORMED_CURSORS + [
+    base64.urlsafe_b64encode(b'{"task":1}').decode(),
+    base64.urlsafe_b64encode(b'{"surah":1,"ayah":0}').decode(),
+])
+def test_export_user_rejects_malformed_cursor(client, user_id, cursor):
+    response = client.get(f"/api/export/users/{user_id}", params={"cursor": cursor})
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize("cursor", MALFORMED_CURSORS + [
+    base64.urlsafe_b64encode(b'{"task":"abc"}').decode(),
+    base64.urlsafe_b64encode(b'{"surah":115,"ayah":0}').decode(),
+])
+def test_export_quran_rejects_malformed_cursor(client, cursor):
+    response = client.get("/api/export/quran", params={"cursor": cursor})
+    assert response.status_code == 400
+
+
+def test_export_quran_unreachable_upstream_ends_with_error_record(client, monkeypatch):
+    monkeypatch.setattr(server, "ALQURAN_API_URL", "http://127.0.0.1:9")
+
+    response = client.get("/api/export/quran")
+    assert response.status_code == 200
+
+    lines = records(response)
+    assert len(lines) == 1
+    assert lines[0]["type"] == "error"
+    assert lines[0]["data"]["surah"] == 1
+    assert decode(lines[0]["cursor"]) == {"surah": 1, "ayah": 0}
+
+
+def test_ndjson_chunks_groups_lines_by_batch_size():
+    async def lines():
+        for i in range(7):
+            yield f"{i}\n"
+
+    async def collect(compress):
+        return [chunk async for chunk in server.ndjson_chunks(lines(), 3, compress)]
+
+    chunks = asyncio.run(collect(False))
+    assert chunks == [b"0\n1\n2\n", b"3\n4\n5\n", b"6\n"]
+
+    compressed = asyncio.run(collect(True))
+    assert len(compressed) == 3
+    assert gzip.decompress(b"".join(compressed)) == b"".join(chunks)